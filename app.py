@@ -1,241 +1,477 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
+from numba import njit
+import os
+import re
+import glob
+import shutil
+import tempfile
+from pathlib import Path
 from datetime import date, timedelta
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 import yfinance as yf
-from prophet import Prophet
-from prophet.plot import plot_plotly
 from plotly import graph_objs as go
+from forecasting import backtest_prophet, fit_prophet
 
-# 1. PAGE SETUP
-st.set_page_config(
-    page_title="Market Minds | AI Analyst", 
-    page_icon="📈", 
-    layout="wide",
-    initial_sidebar_state="expanded"
+# On-disk OHLCV cache (Arrow IPC files, one per ticker and calendar year)
+ARROW_CACHE_DIR = Path.home() / ".cache" / "marketminds"
+# Yahoo symbols (AAPL, BRK-B, BTC-USD, ^GSPC, GC=F, 7203.T); anything else never reaches a path
+TICKER_PATTERN = re.compile(r"[A-Z0-9.^=-]{1,20}")
+
+# 1. CHART HELPER FUNCTION (Makes plots look seamless)
+# Built and validated once at import; style_plot only merges it into each figure
+_BASE_LAYOUT = go.Layout(
+    paper_bgcolor='rgba(0,0,0,0)',  # Transparent background
+    plot_bgcolor='rgba(0,0,0,0)',
+    font=dict(color='#cfcfcf'),
+    xaxis=dict(showgrid=False, color='#666'),
+    yaxis=dict(showgrid=True, gridcolor='#222', color='#666'),
+    margin=dict(l=0, r=0, t=10, b=0), # Remove wasted margins
+    hovermode="x unified",
+    height=550
+)
+
+# Custom Styling for "TradingView" look, in plot_plotly's trace order
+FORECAST_TRACE_STYLES = (
+    dict(marker_color='rgba(79, 139, 249, 0.15)'), # Actual points (Transparent Blue)
+    dict(marker_color='rgba(79, 139, 249, 0.15)'), # Lower uncertainty bound
+    dict(line_color='#4F8BF9'), # Main line (Blue)
 )
 
-# 2. MODERN UI STYLING (CSS)
-st.markdown("""
-<style>
-    /* Remove top padding to maximize screen space */
-    .block-container {
-        padding-top: 1rem;
-        padding-bottom: 5rem;
-    }
-
-    /* METRIC CARDS: Clean, minimal, no heavy borders */
-    div[data-testid="stMetric"] {
-        background-color: rgba(255, 255, 255, 0.05); /* Subtle glass effect */
-        border: 1px solid rgba(255, 255, 255, 0.1);
-        padding: 10px;
-        border-radius: 10px;
-        transition: 0.3s;
-    }
-    div[data-testid="stMetric"]:hover {
-        background-color: rgba(255, 255, 255, 0.1); /* Light up on hover */
-        border-color: rgba(255, 255, 255, 0.3);
-    }
-    div[data-testid="stMetricLabel"] {
-        font-size: 14px;
-        color: #a0a0a0;
-    }
-    div[data-testid="stMetricValue"] {
-        font-size: 26px;
-        font-weight: 600;
-        color: #ffffff;
-    }
-
-    /* TABS: Sleek underline style instead of boxy buttons */
-    .stTabs [data-baseweb="tab-list"] {
-        gap: 25px;
-        border-bottom: 1px solid #333;
-        padding-bottom: 5px;
-    }
-    .stTabs [data-baseweb="tab"] {
-        height: 40px;
-        white-space: pre-wrap;
-        background-color: transparent;
-        border: none;
-        color: #666;
-        font-size: 16px;
-    }
-    .stTabs [aria-selected="true"] {
-        color: #4F8BF9; /* Professional Blue */
-        border-bottom: 2px solid #4F8BF9;
-    }
-
-    /* SIDEBAR: Darker and cleaner */
-    section[data-testid="stSidebar"] {
-        background-color: #111;
-    }
-</style>
-""", unsafe_allow_html=True)
-
-# 3. SIDEBAR CONTROLS
-st.sidebar.header("📊 Market Minds")
-st.sidebar.caption("AI-Powered Financial Forecasting")
-st.sidebar.markdown("---")
-
-selected_stock = st.sidebar.text_input("Ticker Symbol", "BTC-USD").upper()
-n_years = st.sidebar.slider("Training Data (Years)", 1, 5, 2)
-forecast_days = st.sidebar.slider("Forecast Horizon (Days)", 30, 365, 90)
-
-st.sidebar.markdown("### ⚙️ Advanced Tuning")
-changepoint_scale = st.sidebar.slider("Trend Sensitivity", 0.01, 0.5, 0.05, help="Higher = More flexible trend (fits noise). Lower = Smoother trend.")
-seasonality_mode = st.sidebar.selectbox("Seasonality Mode", ["additive", "multiplicative"], index=1)
-
-if st.sidebar.button("↻ Clear Cache"):
-    st.cache_data.clear()
-
-# 4. CHART HELPER FUNCTION (Makes plots look seamless)
 def style_plot(fig):
-    fig.update_layout(
-        paper_bgcolor='rgba(0,0,0,0)',  # Transparent background
-        plot_bgcolor='rgba(0,0,0,0)',
-        font=dict(color='#cfcfcf'),
-        xaxis=dict(showgrid=False, color='#666'),
-        yaxis=dict(showgrid=True, gridcolor='#222', color='#666'),
-        margin=dict(l=0, r=0, t=10, b=0), # Remove wasted margins
-        hovermode="x unified",
-        height=550
-    )
+    fig.update_layout(_BASE_LAYOUT)
     return fig
 
-# 5. DATA ENGINE
-@st.cache_data(ttl=3600)
-def load_data(ticker, years):
-    try:
-        start = (date.today() - timedelta(days=years*365)).strftime("%Y-%m-%d")
-        end = date.today().strftime("%Y-%m-%d")
-        data = yf.download(ticker, start=start, end=end)
+# 2. DATA ENGINE
+@njit(cache=True)
+def dual_sma(close, w1=50, w2=200):
+    # Both SMAs in one pass with running sums: add the new close, drop the one leaving the window.
+    # A window holding any NaN yields NaN, same as rolling(window).mean().
+    n = close.shape[0]
+    sma1 = np.full(n, np.nan)
+    sma2 = np.full(n, np.nan)
+    s1 = s2 = 0.0
+    nan1 = nan2 = 0
+    for i in range(n):
+        x = close[i]
+        if np.isnan(x):
+            nan1 += 1
+            nan2 += 1
+        else:
+            s1 += x
+            s2 += x
+        if i >= w1:
+            old = close[i - w1]
+            if np.isnan(old):
+                nan1 -= 1
+            else:
+                s1 -= old
+        if i >= w2:
+            old = close[i - w2]
+            if np.isnan(old):
+                nan2 -= 1
+            else:
+                s2 -= old
+        if i >= w1 - 1 and nan1 == 0:
+            sma1[i] = s1 / w1
+        if i >= w2 - 1 and nan2 == 0:
+            sma2[i] = s2 / w2
+    return sma1, sma2
+
+def prepare_data(data):
+    # Add SMA
+    close = data['Close'].to_numpy(dtype=np.float64, copy=False)
+    data['SMA_50'], data['SMA_200'] = dual_sma(close)
+    return data
+
+def download_prices(tickers, start, end):
+    # One request for any number of symbols, split back into per-symbol OHLCV frames
+    if len(tickers) == 1:
+        # A single symbol gains nothing from yfinance's thread pool
+        data = yf.download(tickers[0], start=start, end=end, threads=False)
         
         if isinstance(data.columns, pd.MultiIndex):
             data.columns = data.columns.get_level_values(0)
             
-        data.reset_index(inplace=True)
-        # Add SMA
-        data['SMA_50'] = data['Close'].rolling(window=50).mean()
-        data['SMA_200'] = data['Close'].rolling(window=200).mean()
-        return data
+        return {tickers[0]: data.reset_index()}
+
+    data = yf.download(" ".join(tickers), start=start, end=end, group_by='ticker', threads=True)
+    found = data.columns.get_level_values(0)
+    # Symbols trade on different calendars, so drop each one's padding rows
+    return {t: data[t].dropna(how='all').reset_index() for t in tickers if t in found}
+
+def chunk_cache_path(ticker, year, as_of):
+    # A past year is final and kept for good once its Dec 31 bar is at least a day old
+    # (servers ahead of UTC/New York reach Jan 1 before that bar settles); until then,
+    # like the current year, its chunk rolls over daily
+    if date(year + 1, 1, 1) < as_of:
+        return ARROW_CACHE_DIR / f"{ticker}_{year}.arrow"
+    return ARROW_CACHE_DIR / f"{ticker}_{year}_{as_of:%Y-%m-%d}.arrow"
+
+def read_chunk(path):
+    # None if the chunk isn't on disk; one that can't be read (e.g. truncated by a killed
+    # process) is deleted, so it gets refetched instead of failing every later load
+    try:
+        return pd.read_feather(path)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError):
+        path.unlink(missing_ok=True)
+        return None
+
+def write_chunk(chunk, path):
+    # Write to a temp file beside the target and rename it into place, so readers in other
+    # sessions only ever see a complete file
+    fd, tmp = tempfile.mkstemp(dir=ARROW_CACHE_DIR, suffix=".tmp")
+    os.close(fd)
+    try:
+        chunk.to_feather(tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+def load_year_chunks(tickers, year, as_of):
+    # One calendar year of prices per symbol, from disk where possible;
+    # symbols missing on disk are fetched together in one batched request
+    paths = {t: chunk_cache_path(t, year, as_of) for t in tickers}
+    chunks = {}
+    for t, path in paths.items():
+        chunk = read_chunk(path)
+        if chunk is not None:
+            chunks[t] = chunk
+
+    missing = [t for t in tickers if t not in chunks]
+    if missing:
+        # `end` is exclusive, so the current year stops at yesterday's bar
+        end = min(date(year + 1, 1, 1), as_of)
+        fetched = download_prices(missing, f"{year}-01-01", end.strftime("%Y-%m-%d"))
+        ARROW_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        for t, chunk in fetched.items():
+            if chunk.empty:
+                continue
+            for stale in ARROW_CACHE_DIR.glob(f"{glob.escape(t)}_{year}_*.arrow"):
+                # Another session may be cleaning up the same file
+                stale.unlink(missing_ok=True)
+            write_chunk(chunk, paths[t])
+            chunks[t] = chunk
+    return chunks
+
+# History is fetched in calendar-year chunks kept on disk as Arrow IPC (Feather) files,
+# so a daily refresh only re-downloads the current year. `as_of` (today's date) keys
+# the in-memory layer, so it rolls over daily too. Failures raise instead of returning
+# an empty frame, so st.cache_data never keeps them.
+@st.cache_data(max_entries=64, show_spinner="Fetching market data…")
+def load_data(ticker, years, as_of):
+    # `ticker` is one symbol, or a list of symbols fetched in a single batched request
+    # (returned as a {symbol: DataFrame} dict, holding only the symbols that loaded)
+    multi = not isinstance(ticker, str)
+    tickers = list(ticker) if multi else [ticker]
+    for t in tickers:
+        if not TICKER_PATTERN.fullmatch(t):
+            raise ValueError(f"Invalid ticker symbol {t!r}")
+    start = as_of - timedelta(days=years*365)
+    last = as_of - timedelta(days=1)
+    parts = {t: [] for t in tickers}
+    failed = set()
+    for year in range(start.year, last.year + 1):
+        chunks = load_year_chunks(tickers, year, as_of)
+        for t in tickers:
+            if t in chunks:
+                parts[t].append(chunks[t])
+            # yfinance returns an empty frame on errors, so a year missing after the symbol's
+            # history has started is a failed fetch, not a pre-listing year. Only a current-year
+            # window of a few holiday days may legitimately be empty.
+            elif parts[t] and not (year == as_of.year and last < date(year, 1, 7)):
+                failed.add(t)
+
+    frames = {}
+    for t, chunks in parts.items():
+        if not chunks or t in failed:
+            continue
+        data = pd.concat(chunks, ignore_index=True)
+        data = data[data['Date'] >= pd.Timestamp(start)].reset_index(drop=True)
+        if data.empty:
+            continue
+        # One typed datetime64[ns] column (Feather round-trips can come back as [us])
+        data['Date'] = data['Date'].to_numpy(dtype='datetime64[ns]')
+        # float32 prices halve the bandwidth of every later reduction. Volume stays int64:
+        # crypto daily volumes (tens of billions) overflow int32.
+        price_cols = ['Open', 'High', 'Low', 'Close']
+        data[price_cols] = data[price_cols].astype(np.float32)
+        frames[t] = prepare_data(data)
+
+    if not frames:
+        raise ValueError(f"No market data for {', '.join(tickers)}")
+    return frames if multi else frames[ticker]
+
+@st.cache_resource
+def get_executor():
+    # Stan fits are CPU-bound, so run them in worker processes (threads won't help).
+    # forkserver rather than fork: forking Streamlit's multi-threaded server can copy held locks.
+    # The server preloads forecasting (and Prophet) so each worker starts warm.
+    ctx = multiprocessing.get_context("forkserver")
+    ctx.set_forkserver_preload(["forecasting"])
+    return ProcessPoolExecutor(max_workers=2, mp_context=ctx)
+
+# 3. MODEL ENGINE
+# Fits are shared by every session and rerun as Futures keyed on their inputs, so both
+# views' fits can run side by side and a finished one is reused without copying.
+MAX_FIT_JOBS = 32
+
+@st.cache_resource
+def get_fit_jobs():
+    return threading.Lock(), {}
+
+def submit_fit(key, fn, *args, **kwargs):
+    # Reuse the running or finished job for `key`; failed jobs are resubmitted, so errors never stick
+    lock, jobs = get_fit_jobs()
+    with lock:
+        job = jobs.get(key)
+        if job is None or (job.done() and job.exception() is not None):
+            try:
+                job = get_executor().submit(fn, *args, **kwargs)
+            except BrokenProcessPool:
+                # A worker killed mid-fit (cmdstan crash, OOM) leaves the cached pool
+                # permanently broken; replace it
+                get_executor.clear()
+                job = get_executor().submit(fn, *args, **kwargs)
+            jobs.pop(key, None)
+            jobs[key] = job
+            while len(jobs) > MAX_FIT_JOBS:
+                jobs.pop(next(iter(jobs)))
+    return job
+
+def wait_for(start_job):
+    # `start_job()` returns the job's Future; if its worker died, resubmit once on a fresh pool
+    try:
+        return start_job().result()
+    except BrokenProcessPool:
+        return start_job().result()
+
+def to_prophet_frame(data):
+    return data[['Date', 'Close']].rename(columns={"Date": "ds", "Close": "y"})
+
+def forecast_job(ticker, years, as_of, horizon, cps, mode):
+    df_train = to_prophet_frame(load_data(ticker, years, as_of))
+    key = ("forecast", ticker, years, as_of, horizon, cps, mode)
+    return submit_fit(key, fit_prophet, df_train, cps, mode, horizon,
+                      plot=True, trace_styles=FORECAST_TRACE_STYLES, layout=_BASE_LAYOUT)
+
+def backtest_job(ticker, years, as_of, horizon, cps, mode):
+    df_train = to_prophet_frame(load_data(ticker, years, as_of))
+    train_set = df_train.iloc[:-horizon]
+    test_set = df_train.iloc[-horizon:]
+    key = ("backtest", ticker, years, as_of, horizon, cps, mode)
+    return submit_fit(key, backtest_prophet, train_set, test_set, cps, mode, horizon)
+
+# Pool workers re-import this script as __mp_main__ (Streamlit installs it as __main__,
+# which multiprocessing replays in every new process). They only need forecasting.py and
+# the definitions above, so everything below runs only in the Streamlit process.
+if __name__ != "__mp_main__":
+    # 4. PAGE SETUP
+    st.set_page_config(
+        page_title="Market Minds | AI Analyst", 
+        page_icon="📈", 
+        layout="wide",
+        initial_sidebar_state="expanded"
+    )
+
+    # 5. MODERN UI STYLING (CSS)
+    st.markdown("""
+    <style>
+        /* Remove top padding to maximize screen space */
+        .block-container {
+            padding-top: 1rem;
+            padding-bottom: 5rem;
+        }
+
+        /* METRIC CARDS: Clean, minimal, no heavy borders */
+        div[data-testid="stMetric"] {
+            background-color: rgba(255, 255, 255, 0.05); /* Subtle glass effect */
+            border: 1px solid rgba(255, 255, 255, 0.1);
+            padding: 10px;
+            border-radius: 10px;
+            transition: 0.3s;
+        }
+        div[data-testid="stMetric"]:hover {
+            background-color: rgba(255, 255, 255, 0.1); /* Light up on hover */
+            border-color: rgba(255, 255, 255, 0.3);
+        }
+        div[data-testid="stMetricLabel"] {
+            font-size: 14px;
+            color: #a0a0a0;
+        }
+        div[data-testid="stMetricValue"] {
+            font-size: 26px;
+            font-weight: 600;
+            color: #ffffff;
+        }
+
+        /* VIEW PICKER: Sleek underline bar (horizontal radio) instead of boxy buttons */
+        div[role="radiogroup"] {
+            gap: 25px;
+            border-bottom: 1px solid #333;
+            padding-bottom: 5px;
+        }
+        div[role="radiogroup"] label {
+            color: #666;
+            font-size: 16px;
+        }
+        div[role="radiogroup"] label:has(input:checked) {
+            color: #4F8BF9; /* Professional Blue */
+            border-bottom: 2px solid #4F8BF9;
+        }
+
+        /* SIDEBAR: Darker and cleaner */
+        section[data-testid="stSidebar"] {
+            background-color: #111;
+        }
+    </style>
+    """, unsafe_allow_html=True)
+
+    # 6. SIDEBAR CONTROLS
+    st.sidebar.header("📊 Market Minds")
+    st.sidebar.caption("AI-Powered Financial Forecasting")
+    st.sidebar.markdown("---")
+
+    selected_stock = st.sidebar.text_input("Ticker Symbol", "BTC-USD").upper()
+    n_years = st.sidebar.slider("Training Data (Years)", 1, 5, 2)
+    forecast_days = st.sidebar.slider("Forecast Horizon (Days)", 30, 365, 90)
+
+    st.sidebar.markdown("### ⚙️ Advanced Tuning")
+    changepoint_scale = st.sidebar.slider("Trend Sensitivity", 0.01, 0.5, 0.05, help="Higher = More flexible trend (fits noise). Lower = Smoother trend.")
+    seasonality_mode = st.sidebar.selectbox("Seasonality Mode", ["additive", "multiplicative"], index=1)
+
+    if st.sidebar.button("↻ Clear Cache"):
+        st.cache_data.clear()
+        get_fit_jobs.clear()
+        shutil.rmtree(ARROW_CACHE_DIR, ignore_errors=True)
+
+    # 7. MAIN APP
+    # One date for the whole rerun, so the price data and the fits keyed on it always agree
+    as_of = date.today()
+    try:
+        data = load_data(selected_stock, n_years, as_of)
     except Exception:
-        return pd.DataFrame()
-
-# 6. MAIN APP
-data = load_data(selected_stock, n_years)
-
-if data.empty:
-    st.warning(f"⚠️ Could not validate ticker '{selected_stock}'. Please try again.")
-else:
-    # --- HEADER SECTION ---
-    current_price = data.iloc[-1]['Close']
-    prev_price = data.iloc[-2]['Close']
-    delta = current_price - prev_price
-    pct_change = (delta / prev_price) * 100
-    
-    col_head1, col_head2 = st.columns([3, 1])
-    with col_head1:
-        st.markdown(f"<h1 style='margin-bottom: 0px;'>{selected_stock}</h1>", unsafe_allow_html=True)
-        st.caption(f"Analyzing last {n_years} years of market data • Forecast for next {forecast_days} days")
-    with col_head2:
-        # Custom HTML for big price display
-        color_hex = "#00FFA3" if delta > 0 else "#FF4B4B"
-        st.markdown(f"""
-            <div style="text-align: right; padding-right: 10px;">
-                <div style="font-size: 36px; font-weight: bold;">${current_price:,.2f}</div>
-                <div style="color: {color_hex}; font-size: 18px;">{delta:+.2f} ({pct_change:+.2f}%)</div>
-            </div>
-        """, unsafe_allow_html=True)
-
-    st.write("") # Spacer
-
-    # --- KPI GRID ---
-    kpi1, kpi2, kpi3, kpi4 = st.columns(4)
-    kpi1.metric("Highest (Period)", f"${data['High'].max():,.2f}")
-    kpi2.metric("Lowest (Period)", f"${data['Low'].min():,.2f}")
-    kpi3.metric("Volume (24h)", f"{data.iloc[-1]['Volume']:,}")
-    kpi4.metric("50-Day SMA", f"${data.iloc[-1]['SMA_50']:,.2f}")
-
-    st.write("") # Spacer
-
-    # --- TABS ---
-    tab_forecast, tab_backtest, tab_chart = st.tabs(["🔮 AI Forecast", "⚖️ Backtest Accuracy", "🕯️ Candlestick Chart"])
-
-    # TAB 1: FORECAST
-    with tab_forecast:
-        with st.spinner("🤖 Crunching numbers..."):
-            # Prophet Setup
-            df_train = data[['Date', 'Close']].rename(columns={"Date": "ds", "Close": "y"})
-            m = Prophet(changepoint_prior_scale=changepoint_scale, seasonality_mode=seasonality_mode)
-            m.fit(df_train)
-            future = m.make_future_dataframe(periods=forecast_days)
-            forecast = m.predict(future)
-
-            # Plot
-            fig_p = plot_plotly(m, forecast)
-            
-            # Custom Styling for "TradingView" look
-            fig_p.data[2].line.color = '#4F8BF9' # Main line (Blue)
-            fig_p.data[0].marker.color = 'rgba(79, 139, 249, 0.15)' # Uncertainty band (Transparent Blue)
-            fig_p.data[1].marker.color = 'rgba(79, 139, 249, 0.15)'
-            
-            st.plotly_chart(style_plot(fig_p), use_container_width=True)
-            
-            # Forecast Stats
-            pred_price = forecast.iloc[-1]['yhat']
-            trend = "Bullish 🟢" if pred_price > current_price else "Bearish 🔴"
-            st.info(f"Target Price ({forecast_days} days): **${pred_price:,.2f}** | Trend: **{trend}**")
+        data = pd.DataFrame()
 
-    # TAB 2: BACKTEST
-    with tab_backtest:
-        st.markdown("##### 🕵️‍♂️ Reality Check")
-        st.caption(f"We hid the last {forecast_days} days of data to see if the AI could predict them.")
+    if data.empty:
+        st.warning(f"⚠️ Could not validate ticker '{selected_stock}'. Please try again.")
+    else:
+        # --- HEADER SECTION ---
+        # Plain NumPy views, grabbed once for the header and KPI grid:
+        # positional scalar reads and reductions without pandas dispatch
+        closes = data['Close'].to_numpy()
+        highs = data['High'].to_numpy()
+        lows = data['Low'].to_numpy()
+        volumes = data['Volume'].to_numpy()
+        smas = data['SMA_50'].to_numpy()
+        current_price, prev_price = closes[-1], closes[-2]
+        delta = current_price - prev_price
+        pct_change = (delta / prev_price) * 100
 
+        col_head1, col_head2 = st.columns([3, 1])
+        with col_head1:
+            st.markdown(f"<h1 style='margin-bottom: 0px;'>{selected_stock}</h1>", unsafe_allow_html=True)
+            st.caption(f"Analyzing last {n_years} years of market data • Forecast for next {forecast_days} days")
+        with col_head2:
+            # Custom HTML for big price display
+            color_hex = "#00FFA3" if delta > 0 else "#FF4B4B"
+            st.markdown(f"""
+                <div style="text-align: right; padding-right: 10px;">
+                    <div style="font-size: 36px; font-weight: bold;">${current_price:,.2f}</div>
+                    <div style="color: {color_hex}; font-size: 18px;">{delta:+.2f} ({pct_change:+.2f}%)</div>
+                </div>
+            """, unsafe_allow_html=True)
+
+        st.write("") # Spacer
+
+        # --- KPI GRID ---
+        kpi1, kpi2, kpi3, kpi4 = st.columns(4)
+        kpi1.metric("Highest (Period)", f"${np.nanmax(highs):,.2f}")
+        kpi2.metric("Lowest (Period)", f"${np.nanmin(lows):,.2f}")
+        kpi3.metric("Volume (24h)", f"{volumes[-1]:,}")
+        kpi4.metric("50-Day SMA", f"${smas[-1]:,.2f}")
+
+        st.write("") # Spacer
+
+        df_train = to_prophet_frame(data)
         train_len = len(df_train) - forecast_days
-        if train_len < 30:
-            st.error("Not enough data to run backtest. Increase training history.")
+        model_args = (selected_stock, n_years, as_of, forecast_days, changepoint_scale, seasonality_mode)
+
+        # --- VIEWS ---
+        # A radio instead of st.tabs: Streamlit runs every tab body on each rerun,
+        # so the Prophet fits would run even while only the candlestick chart is shown
+        VIEW_FORECAST, VIEW_BACKTEST, VIEW_CHART = "🔮 AI Forecast", "⚖️ Backtest Accuracy", "🕯️ Candlestick Chart"
+        view = st.radio("View", [VIEW_FORECAST, VIEW_BACKTEST, VIEW_CHART], horizontal=True, key='active_tab', label_visibility="collapsed")
+
+        # Opening either model view starts both fits in the background, so switching to the
+        # other one finds its result ready (or already running); the chart view starts neither
+        if view != VIEW_CHART:
+            forecast_job(*model_args)
+            if train_len >= 30:
+                backtest_job(*model_args)
+
+        # VIEW 1: FORECAST
+        if view == VIEW_FORECAST:
+            with st.spinner("🤖 Crunching numbers..."):
+                # Prophet Result (shared by every session and rerun, so read-only; the worker styled the chart)
+                forecast, fig_p = wait_for(lambda: forecast_job(*model_args))
+
+                # Plot
+                st.plotly_chart(fig_p, use_container_width=True)
+
+                # Forecast Stats
+                pred_price = forecast.iloc[-1]['yhat']
+                trend = "Bullish 🟢" if pred_price > current_price else "Bearish 🔴"
+                st.info(f"Target Price ({forecast_days} days): **${pred_price:,.2f}** | Trend: **{trend}**")
+
+        # VIEW 2: BACKTEST
+        elif view == VIEW_BACKTEST:
+            st.markdown("##### 🕵️‍♂️ Reality Check")
+            st.caption(f"We hid the last {forecast_days} days of data to see if the AI could predict them.")
+
+            if train_len < 30:
+                st.error("Not enough data to run backtest. Increase training history.")
+            else:
+                train_set = df_train.iloc[:train_len]
+                test_set = df_train.iloc[train_len:]
+                with st.spinner("🤖 Crunching numbers..."):
+                    forecast_bt, mae, mape = wait_for(lambda: backtest_job(*model_args))
+
+                col_b1, col_b2, col_b3 = st.columns(3)
+                col_b1.metric("MAE (Avg Error)", f"${mae:,.2f}")
+                col_b2.metric("MAPE (Error %)", f"{mape:.2f}%")
+
+                if mape < 5: col_b3.success("✅ Excellent Accuracy")
+                elif mape < 10: col_b3.warning("⚠️ Good Accuracy")
+                else: col_b3.error("❌ Poor Accuracy")
+
+                # Plot Backtest
+                fig_bt = go.Figure()
+                fig_bt.add_trace(go.Scattergl(x=train_set['ds'].to_numpy(), y=train_set['y'], name="Training Data", line=dict(color='#888')))
+                fig_bt.add_trace(go.Scattergl(x=test_set['ds'].to_numpy(), y=test_set['y'], name="Actual Price", line=dict(color='#00FFA3', width=2)))
+                fig_bt.add_trace(go.Scattergl(x=forecast_bt['ds'].to_numpy(), y=forecast_bt['yhat'], name="AI Prediction", line=dict(color='#FF4B4B', dash='dot')))
+
+                st.plotly_chart(style_plot(fig_bt), use_container_width=True)
+
+        # VIEW 3: CANDLESTICK
         else:
-            train_set = df_train.iloc[:train_len]
-            test_set = df_train.iloc[train_len:]
-            
-            m_bt = Prophet(changepoint_prior_scale=changepoint_scale, seasonality_mode=seasonality_mode)
-            m_bt.fit(train_set)
-            future_bt = m_bt.make_future_dataframe(periods=forecast_days)
-            forecast_bt = m_bt.predict(future_bt)
-            
-            # Metrics
-            combined = pd.merge(test_set, forecast_bt[['ds', 'yhat']], on='ds')
-            combined['AbsError'] = (combined['y'] - combined['yhat']).abs()
-            mae = combined['AbsError'].mean()
-            mape = (combined['AbsError'] / combined['y']).mean() * 100
-            
-            col_b1, col_b2, col_b3 = st.columns(3)
-            col_b1.metric("MAE (Avg Error)", f"${mae:,.2f}")
-            col_b2.metric("MAPE (Error %)", f"{mape:.2f}%")
-            
-            if mape < 5: col_b3.success("✅ Excellent Accuracy")
-            elif mape < 10: col_b3.warning("⚠️ Good Accuracy")
-            else: col_b3.error("❌ Poor Accuracy")
-            
-            # Plot Backtest
-            fig_bt = go.Figure()
-            fig_bt.add_trace(go.Scatter(x=train_set['ds'], y=train_set['y'], name="Training Data", line=dict(color='#888')))
-            fig_bt.add_trace(go.Scatter(x=test_set['ds'], y=test_set['y'], name="Actual Price", line=dict(color='#00FFA3', width=2)))
-            fig_bt.add_trace(go.Scatter(x=forecast_bt['ds'], y=forecast_bt['yhat'], name="AI Prediction", line=dict(color='#FF4B4B', dash='dot')))
-            
-            st.plotly_chart(style_plot(fig_bt), use_container_width=True)
-
-    # TAB 3: CANDLESTICK
-    with tab_chart:
-        fig_candle = go.Figure(data=[go.Candlestick(
-            x=data['Date'],
-            open=data['Open'], high=data['High'],
-            low=data['Low'], close=data['Close'],
-            name=selected_stock
-        )])
-        # Add SMAs
-        fig_candle.add_trace(go.Scatter(x=data['Date'], y=data['SMA_50'], name="50 SMA", line=dict(color='orange', width=1)))
-        fig_candle.add_trace(go.Scatter(x=data['Date'], y=data['SMA_200'], name="200 SMA", line=dict(color='purple', width=1)))
-        
-        fig_candle.update_layout(xaxis_rangeslider_visible=False)
-        st.plotly_chart(style_plot(fig_candle), use_container_width=True)
\ No newline at end of file
+            fig_candle = go.Figure()
+            fig_candle.add_trace(go.Candlestick(
+                x=data['Date'].to_numpy(),
+                open=data['Open'], high=data['High'],
+                low=data['Low'], close=data['Close'],
+                name=selected_stock
+            ))
+            # Add SMAs
+            fig_candle.add_trace(go.Scattergl(x=data['Date'].to_numpy(), y=data['SMA_50'], name="50 SMA", line=dict(color='orange', width=1)))
+            fig_candle.add_trace(go.Scattergl(x=data['Date'].to_numpy(), y=data['SMA_200'], name="200 SMA", line=dict(color='purple', width=1)))
+
+            fig_candle.update_layout(xaxis_rangeslider_visible=False)
+            st.plotly_chart(style_plot(fig_candle), use_container_width=True)
\ No newline at end of file
@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+from prophet import Prophet
+from prophet.plot import plot_plotly
+
+# Relaxed L-BFGS tolerances: UI-grade forecasts don't need the last digits of the MAP fit
+FAST_FIT_ARGS = dict(algorithm='LBFGS', iter=2000, tol_obj=1e-6, tol_rel_obj=1e4)
+
+
+# PROPHET WORKER
+# Kept out of app.py so the process pool can pickle it by reference
+# (Streamlit re-executes app.py as a fresh __main__ on every rerun).
+# `future_ds` replaces the calendar-day horizon with explicit dates to score after the
+# history (e.g. the trading days hidden by a backtest).
+# `uncertainty=False` skips the Monte-Carlo draws behind yhat_lower/yhat_upper.
+# `plot=True` also returns the plot_plotly chart, so the app never rebuilds the model.
+# It is styled here (`trace_styles` in plot_plotly's trace order, then `layout`) because
+# the app shares the result between sessions and must not modify it.
+def fit_prophet(df, cps, mode, horizon, future_ds=None, uncertainty=True,
+                plot=False, trace_styles=(), layout=None):
+    samples = 1000 if uncertainty else 0
+
+    def new_model():
+        return Prophet(changepoint_prior_scale=cps, seasonality_mode=mode,
+                       uncertainty_samples=samples, stan_backend='CMDSTANPY')
+
+    m = new_model()
+    # Prophet's own Newton fallback would reject the L-BFGS tolerances, so on failure
+    # refit from scratch with Prophet's default (strict) settings instead
+    m.stan_backend.set_options(newton_fallback=False)
+    try:
+        m.fit(df, **FAST_FIT_ARGS)
+    except RuntimeError:
+        m = new_model()
+        m.fit(df)
+    if future_ds is None:
+        future = m.make_future_dataframe(periods=horizon)
+    else:
+        future = pd.DataFrame({'ds': pd.concat([df['ds'], future_ds], ignore_index=True)})
+    forecast = m.predict(future)
+    figure = None
+    if plot:
+        figure = plot_plotly(m, forecast)
+        for trace, trace_style in zip(figure.data, trace_styles):
+            trace.update(trace_style)
+        if layout is not None:
+            figure.update_layout(layout)
+    return forecast, figure
+
+
+# Fits on `train_set`, scores its history plus the hidden `test_set` days and returns
+# (forecast, MAE, MAPE), so the metrics are cached with the job's result.
+def backtest_prophet(train_set, test_set, cps, mode, horizon):
+    # The in-sample rows feed the chart's trend overlay; the hidden trading days come last,
+    # so the forecast tail lines up with test_set by position
+    forecast_bt, _ = fit_prophet(train_set, cps, mode, horizon, test_set['ds'], uncertainty=False)
+    assert forecast_bt['ds'].iloc[-1] == test_set['ds'].iloc[-1]
+
+    # Metrics (hidden window only)
+    y = test_set['y'].to_numpy(dtype=np.float64)
+    yhat = forecast_bt['yhat'].to_numpy()[-len(test_set):]
+    err = np.abs(y - yhat)
+    mae = err.mean()
+    mape = (err / y).mean() * 100
+    return forecast_bt, mae, mape